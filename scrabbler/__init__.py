@@ -1 +1,22 @@
-from scrabbler.scrabbler import Game
+"""Submodules are imported on first use so that importing this package stays fast"""
+
+import importlib
+
+__all__ = ["Game"]  # ArrayBoard is left out as it requires numpy
+
+_lazy_attributes = {
+    "Game": "scrabbler.scrabbler",
+    "ArrayBoard": "scrabbler.array_board",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -0,0 +1,268 @@
+"""This file implements a board backed by NumPy arrays
+
+Tiles are stored as a uint8 grid where 0 is an empty square and 1 to 26 are the letters
+A to Z, cross sets as uint32 grids where bit i is set if the i-th letter is allowed, and
+score multipliers as small integer grids. Anchors, word extents and multiplier lookups
+are computed for the whole board at once instead of square by square.
+
+Game only uses the anchors of this board to drive the search, the extents, cross sets and
+multipliers are available for analyses that work on whole boards or batches of boards.
+
+Grids are indexed by [row, col]. Computations along a direction are done on the grid
+itself for "across" and on its transpose for "down".
+
+"""
+
+import os
+import sys
+import json
+import random
+import string
+import argparse
+from scrabbler.scrabbler import Game, Board, SquareEffect, resource_dir
+import utilities.errors as errors
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("the array board requires numpy, install it with \"pip install numpy\"")
+
+FULL_CROSS_SET = (1 << len(string.ascii_uppercase)) - 1
+
+_letter_multipliers = {SquareEffect.DL: 2, SquareEffect.TL: 3}
+_word_multipliers = {SquareEffect.DW: 2, SquareEffect.TW: 3}
+
+
+class ArrayBoard:
+    """stores a board as NumPy arrays
+
+    Attributes:
+        board_type: the type of the board
+        size: the number of squares on each side of the board
+        tiles: uint8 grid of the tiles on the board, 0 for empty squares
+        cross_sets: uint32 grids of the letters allowed on each square for each direction
+        letter_multipliers: int8 grid of the letter score multiplier of each square
+        word_multipliers: int8 grid of the word score multiplier of each square
+
+    """
+
+    def __init__(self, board_type):
+        """sets up an empty board from the board configuration file"""
+
+        self.board_type = board_type
+        self.empty = True
+
+        with open(os.path.join(resource_dir, board_type, "board.json")) as json_data:
+            board_data = json.load(json_data)
+        self.size = board_data['size']
+        shape = (self.size, self.size)
+
+        self.tiles = np.zeros(shape, dtype=np.uint8)
+        self.cross_sets = {
+            "across": np.full(shape, FULL_CROSS_SET, dtype=np.uint32),
+            "down": np.full(shape, FULL_CROSS_SET, dtype=np.uint32)
+        }
+
+        special_squares = board_data['special_squares']
+        self.letter_multipliers = np.ones(shape, dtype=np.int8)
+        self.word_multipliers = np.ones(shape, dtype=np.int8)
+        for effect, multiplier in _letter_multipliers.items():
+            rows, cols = np.array(special_squares[effect.name], dtype=np.intp).reshape(-1, 2).T
+            self.letter_multipliers[rows, cols] = multiplier
+        for effect, multiplier in _word_multipliers.items():
+            rows, cols = np.array(special_squares[effect.name], dtype=np.intp).reshape(-1, 2).T
+            self.word_multipliers[rows, cols] = multiplier
+
+        self._extents = {}
+
+    def __str__(self):
+        chars = np.where(self.tiles > 0, self.tiles + ord('A') - 1, ord('-')).astype(np.uint8)
+        return "".join("  ".join(row.tobytes().decode()) + "\n" for row in chars)
+
+    @classmethod
+    def from_board(cls, board: Board) -> "ArrayBoard":
+        """creates an array board with the same tiles and cross sets as the given board"""
+
+        array_board = cls(board.board_type)
+        for row in range(board.size):
+            for col in range(board.size):
+                tile = board.square(row, col).tile
+                if tile:
+                    array_board.tiles[row, col] = ord(tile) - ord('A') + 1
+        array_board.empty = board.empty
+        array_board.load_cross_sets(board)
+        return array_board
+
+    def load_cross_sets(self, board: Board, coordinates=None):
+        """copies the cross sets of the given board into the mask grids
+
+        Args:
+            board: the board to copy the cross sets from
+            coordinates: the squares to copy, such as those returned by Board.update_cross_set,
+                all squares are copied if this is left blank
+
+        """
+
+        if coordinates is None:
+            coordinates = [(row, col) for row in range(board.size) for col in range(board.size)]
+        for direction, masks in self.cross_sets.items():
+            for coordinate in coordinates:
+                cross_set = board.square(*coordinate).cross_set(direction)
+                masks[coordinate] = sum(1 << (ord(char) - ord('A')) for char in cross_set)
+
+    def cross_set(self, row, col, direction):
+        """gets the set of letters allowed on the given square"""
+        mask = int(self.cross_sets[direction][row, col])
+        return set(char for i, char in enumerate(string.ascii_uppercase) if mask >> i & 1)
+
+    def place_word(self, start_coordinate, word, direction):
+        """puts a word on the board"""
+
+        row, col = start_coordinate
+        tiles = self.tiles if direction == "across" else self.tiles.T
+        if direction == "down":
+            row, col = col, row
+        elif direction != "across":
+            raise TypeError("invalid direction specified: {}".format(direction))
+
+        if row < 0 or row >= self.size or col < 0 or col + len(word) > self.size:
+            raise errors.IllegalMoveError("The length of word is out of bounds of the board")
+
+        letters = np.frombuffer(word.upper().encode(), dtype=np.uint8) - (ord('A') - 1)
+        if np.any((letters < 1) | (letters > 26)):
+            raise errors.IllegalMoveError("illegal move! Letter placed must be in the alphabet")
+        existing = tiles[row, col:col + len(word)]
+        if np.any((existing > 0) & (existing != letters)):
+            raise errors.IllegalMoveError("Cannot place this word on the given coordinates")
+
+        existing[:] = letters
+        self.empty = False
+        self._extents.clear()
+
+    def anchors(self, direction):
+        """gets a boolean grid of the anchor squares for moves in the given direction
+
+        An empty square is an anchor if a tile is adjacent to it in the other direction, and
+        an occupied square is an anchor if it is the last tile of a word in this direction.
+
+        """
+
+        occupied = self.__oriented(self.tiles, direction) > 0
+        right = np.zeros_like(occupied)
+        right[:, :-1] = occupied[:, 1:]
+        adjacent = np.zeros_like(occupied)
+        adjacent[1:, :] |= occupied[:-1, :]
+        adjacent[:-1, :] |= occupied[1:, :]
+        anchors = (~occupied & adjacent) | (occupied & ~right)
+        return self.__oriented(anchors, direction)
+
+    def anchor_list(self, direction):
+        """gets the coordinates of anchors in the same order as Board.anchors"""
+
+        lines, positions = np.nonzero(self.__oriented(self.anchors(direction), direction))
+        if direction == "across":
+            return list(zip(lines.tolist(), positions.tolist()))
+        return list(zip(positions.tolist(), lines.tolist()))
+
+    def word_extents(self, direction):
+        """gets the grids of the first and last index along the direction of the word on each square
+
+        Empty squares get their own index for both.
+
+        """
+
+        if direction not in self._extents:
+            occupied = self.__oriented(self.tiles, direction) > 0
+            index = np.broadcast_to(np.arange(self.size), occupied.shape)
+            last_empty = np.maximum.accumulate(np.where(occupied, -1, index), axis=1)
+            next_empty = np.minimum.accumulate(np.where(occupied, self.size, index)[:, ::-1], axis=1)[:, ::-1]
+            first = np.where(occupied, last_empty + 1, index)
+            last = np.where(occupied, next_empty - 1, index)
+            self._extents[direction] = self.__oriented(first, direction), self.__oriented(last, direction)
+        return self._extents[direction]
+
+    def fast_forward(self, start_coordinate, direction, step):
+        """fast forward the coordinate to the last letter in the word"""
+
+        next_coordinate = Board.offset(start_coordinate, direction, step)
+        if any(index < 0 or index >= self.size for index in next_coordinate) or not self.tiles[next_coordinate]:
+            return start_coordinate
+        first, last = self.word_extents(direction)
+        end = int(last[next_coordinate] if step > 0 else first[next_coordinate])
+        return (start_coordinate[0], end) if direction == "across" else (end, start_coordinate[1])
+
+    def multipliers(self, coordinates):
+        """gets the letter and word multipliers of a list of coordinates as two arrays"""
+
+        rows, cols = np.array(coordinates, dtype=np.intp).reshape(-1, 2).T
+        return self.letter_multipliers[rows, cols], self.word_multipliers[rows, cols]
+
+    def differences(self, board: Board):
+        """lists the ways in which this board differs from the given board, empty if they match"""
+
+        differences = []
+        if str(self) != str(board):
+            differences.append("tiles differ")
+        for direction in ["across", "down"]:
+            if self.anchor_list(direction) != board.anchors(direction):
+                differences.append("{} anchors differ".format(direction))
+            for row in range(self.size):
+                for col in range(self.size):
+                    square = board.square(row, col)
+                    if self.cross_set(row, col, direction) != set(square.cross_set(direction)):
+                        differences.append("{} cross set differs at {}".format(direction, (row, col)))
+                    for step in [1, -1]:
+                        expected = board.fast_forward((row, col), direction, step)
+                        if self.fast_forward((row, col), direction, step) != expected:
+                            differences.append("{} fast forward differs at {}".format(direction, (row, col)))
+
+        letter_multipliers, word_multipliers = self.multipliers(
+            [(row, col) for row in range(self.size) for col in range(self.size)])
+        for index, square in enumerate(board.square(row, col) for row in range(self.size) for col in range(self.size)):
+            if letter_multipliers[index] != _letter_multipliers.get(square.effect, 1) or \
+                    word_multipliers[index] != _word_multipliers.get(square.effect, 1):
+                differences.append("multipliers differ at {}".format(divmod(index, self.size)))
+        return differences
+
+    @staticmethod
+    def __oriented(grid, direction):
+        return grid if direction == "across" else grid.T
+
+
+def main():
+    """plays a game of best moves with random racks, checking the array board against the board each turn"""
+
+    parser = argparse.ArgumentParser(description="Check that the array board matches the board.")
+    parser.add_argument("--board", default="wwf15")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = Game(board=args.board, array_board=True)
+    letters = list(game.tiles)
+    rng = random.Random(args.seed)
+    failures = []
+
+    for turn in range(args.turns):
+        rack = "".join(rng.choice(letters) for _ in range(7))
+        array_moves = game.find_best_moves(rack, 5, show=False)
+        array_board, game.array_board = game.array_board, None
+        board_moves = game.find_best_moves(rack, 5, show=False)
+        game.array_board = array_board
+        if [str(move) for move in array_moves] != [str(move) for move in board_moves]:
+            failures.append("turn {}: moves differ for rack {}".format(turn, rack))
+
+        if array_moves:
+            game.play(array_moves[0].start_square, array_moves[0].word, array_moves[0].direction)
+        differences = game.array_board.differences(game.board)
+        failures.extend("turn {}: {}".format(turn, difference) for difference in differences)
+
+    print(game.board)
+    for failure in failures:
+        print(failure)
+    print("{} turns checked, {} differences found.".format(args.turns, len(failures)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""This file implements a startup time benchmark
+
+Each scenario is run in a fresh interpreter from the root directory, so that the cost of
+imports and of loading the dictionary is measured as a user of the package would see it.
+
+Usage:
+    python -m scrabbler.benchmark --board wwf15 --repeat 5
+
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from scrabbler.scrabbler import resource_dir
+
+root_dir = os.path.abspath(os.path.join(resource_dir, ".."))
+
+SCENARIOS = [
+    ("import scrabbler", "import scrabbler"),
+    ("import scrabbler.scrabbler (eager)", "import scrabbler.scrabbler"),
+    ("Game, lazy dictionary", "import scrabbler; scrabbler.Game(board={board!r}, load_dictionary='lazy')"),
+    ("Game, eager dictionary", "import scrabbler; scrabbler.Game(board={board!r}, load_dictionary='eager')"),
+    ("first search, eager", "import scrabbler; g = scrabbler.Game(board={board!r}, load_dictionary='eager');"
+                            " g.find_best_moves('WDERSER', show=False)"),
+    ("first search, background", "import scrabbler; g = scrabbler.Game(board={board!r}, load_dictionary='background');"
+                                 " g.find_best_moves('WDERSER', show=False)"),
+]
+
+
+def time_command(code, repeat):
+    """runs the code in a new interpreter and returns the fastest wall time in seconds"""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=root_dir, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the scrabbler package.")
+    parser.add_argument("--board", default="wwf15")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # make sure the dictionary has been constructed and saved before timing anything
+    time_command("import scrabbler; scrabbler.Game(board={!r}).dictionary".format(args.board), 1)
+
+    baseline = time_command("pass", args.repeat)
+    print("{:<36} {:>10}".format("interpreter startup", "{:.1f} ms".format(baseline * 1000)))
+    for name, code in SCENARIOS:
+        elapsed = time_command(code.format(board=args.board), args.repeat)
+        print("{:<36} {:>10}".format(name, "{:.1f} ms".format((elapsed - baseline) * 1000)))
+
+
+if __name__ == "__main__":
+    main()
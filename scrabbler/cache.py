@@ -0,0 +1,144 @@
+"""This file implements a bounded cache for move generation results
+
+Results are keyed by the Zobrist hash of the board, the sorted rack and the number of
+moves requested. An in-memory LRU tier is always used, and an optional on-disk tier can
+be enabled by providing a directory, so that results survive across processes.
+
+References:
+    https://en.wikipedia.org/wiki/Zobrist_hashing
+
+"""
+
+import os
+import copy
+from collections import OrderedDict
+
+
+class MoveCache:
+    """A least recently used cache of generated moves
+
+    Attributes:
+        maxsize (int): the maximum number of entries kept in memory
+        directory (str): the directory of the on-disk tier, disabled if None
+        disk_maxsize (int): the maximum number of entries kept on disk, unbounded if None
+        hits (int): the number of lookups answered by the cache
+        misses (int): the number of lookups not found in the cache
+        evictions (int): the number of entries evicted from memory
+
+    """
+
+    def __init__(self, maxsize=1024, directory=None, disk_maxsize=None):
+        if maxsize <= 0:
+            raise ValueError("the size of the cache must be positive: {}".format(maxsize))
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or bool(self.directory and os.path.exists(self.__path(key)))
+
+    @staticmethod
+    def make_key(board, rack, num):
+        """creates the key for a lookup of the given board, rack and number of moves"""
+        return board.board_type, board.hash, "".join(sorted(rack)), num
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """returns a copy of the stored moves for the given key, or None if absent"""
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return copy.deepcopy(self._entries[key])
+
+        moves = self.__load(key) if self.directory else None
+        if moves is None:
+            self.misses = self.misses + 1
+            return None
+
+        self.hits = self.hits + 1
+        self.__insert(key, moves)
+        return copy.deepcopy(moves)
+
+    def put(self, key, moves):
+        """stores a copy of a list of moves under the given key"""
+
+        moves = copy.deepcopy(moves)
+        self.__insert(key, moves)
+        if self.directory:
+            self.__store(key, moves)
+
+    def clear(self):
+        """removes all entries from memory and resets the counters"""
+
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __insert(self, key, moves):
+        self._entries[key] = moves
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions = self.evictions + 1
+
+    def __path(self, key):
+        board_type, board_hash, rack, num = key
+        filename = "{}-{:016x}-{}-{}.p".format(board_type, board_hash, rack.replace("?", "_"), num)
+        return os.path.join(self.directory, filename)
+
+    def __load(self, key):
+        """loads an entry from the on-disk tier, returns None if absent or unreadable
+
+        The modification time of the file is updated on a hit, so that the least recently
+        used files are the ones evicted from the disk.
+
+        """
+
+        import pickle
+        import gzip
+
+        path = self.__path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rb") as f:
+                stored_key, moves = pickle.loads(f.read())
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        os.utime(path)
+        return moves
+
+    def __store(self, key, moves):
+        """writes an entry to the on-disk tier, evicting the oldest files if over the limit"""
+
+        import pickle
+        import gzip
+
+        with gzip.open(self.__path(key), "wb") as f:
+            f.write(pickle.dumps((key, moves)))
+
+        if self.disk_maxsize is None:
+            return
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".p")]
+        if len(paths) <= self.disk_maxsize:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.disk_maxsize]:
+            os.remove(path)
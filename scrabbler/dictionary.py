@@ -8,9 +8,6 @@ References:
 
 """
 
-import pickle
-import gzip
-
 DELIMITER = "#"
 
 
@@ -30,6 +27,9 @@ class Dictionary:
     def store(self, filename: str):
         """stores a GADDAG data structure to the designated file"""
 
+        import pickle
+        import gzip
+
         with gzip.open(filename, "wb") as f:
             f.write(pickle.dumps(self.root))
 
@@ -67,6 +67,9 @@ class Dictionary:
     def __load_picked_dictionary_from_file(filename) -> "State":
         """loads a GADDAG data structure from a file"""
 
+        import pickle
+        import gzip
+
         with gzip.open(filename, "rb") as f:
             return pickle.loads(f.read())
 
@@ -0,0 +1,100 @@
+"""This file implements a load test client for the move generation server
+
+Random racks are drawn from the tile list of the board and sent over a number of
+concurrent connections. The throughput and latency percentiles are reported at the end.
+
+Usage:
+    python -m scrabbler.loadtest --port 8765 --requests 200 --concurrency 8
+
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from scrabbler.scrabbler import resource_dir
+
+
+def percentile(values, fraction):
+    """gets the value below which the given fraction of the sorted values fall"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return sorted(values)[index]
+
+
+def random_racks(board_type, count, seed=0):
+    """draws random racks of seven letters using the letters of the board's tile list"""
+
+    with open(os.path.join(resource_dir, board_type, "tile_list.txt")) as f:
+        letters = [line[0] for line in f if line.strip()]
+    rng = random.Random(seed)
+    return ["".join(rng.choice(letters) for _ in range(7)) for _ in range(count)]
+
+
+async def run(requests, concurrency, host, port, path, batch_size):
+    """sends the requests over concurrent connections, returns the latencies and the error count"""
+
+    queue = asyncio.Queue()
+    for i in range(0, len(requests), batch_size):
+        queue.put_nowait(requests[i:i + batch_size])
+    latencies = []
+    errors = []
+
+    async def client():
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        while not queue.empty():
+            batch = queue.get_nowait()
+            payload = batch if batch_size > 1 else batch[0]
+            start = time.perf_counter()
+            writer.write(json.dumps(payload).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            elapsed = time.perf_counter() - start
+            responses = response if isinstance(response, list) else [response]
+            latencies.extend(elapsed for _ in responses)
+            errors.extend(r["error"] for r in responses if "error" in r)
+        writer.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput and latency of the move server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this unix socket path instead of a TCP port")
+    parser.add_argument("--board", default="wwf15")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1, help="requests sent per message")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(os.path.join(resource_dir, args.board, "board.json")) as json_data:
+        mid = json.load(json_data)["size"] // 2
+    plays = [{"start": [mid, mid - 2], "word": "HELLO", "direction": "across"}]
+    requests = [{"board": args.board, "rack": rack, "plays": plays}
+                for rack in random_racks(args.board, args.requests, args.seed)]
+
+    start = time.perf_counter()
+    latencies, errors = asyncio.run(
+        run(requests, args.concurrency, args.host, args.port, args.unix, args.batch_size))
+    elapsed = time.perf_counter() - start
+
+    print("requests:    {} ({} errors)".format(len(latencies), len(errors)))
+    print("throughput:  {:.1f} requests/s".format(len(latencies) / elapsed))
+    print("latency p50: {:.1f} ms".format(percentile(latencies, 0.50) * 1000))
+    print("latency p99: {:.1f} ms".format(percentile(latencies, 0.99) * 1000))
+    for error in sorted(set(errors))[:5]:
+        print("error:       {}".format(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,8 @@
 import os
-import pickle
 import string
-import json
-import gzip
 from enum import Enum
 from scrabbler.dictionary import Dictionary, DELIMITER, Arc
+from scrabbler.cache import MoveCache
 import utilities.logger as logger
 import utilities.errors as errors
 
@@ -12,57 +10,106 @@ script_dir = os.path.dirname(__file__)
 resource_dir = os.path.join(script_dir, "../resources")
 full_saved_games_dir = os.path.join(script_dir, "../games/")
 
+ZOBRIST_SEED = 0x5C4AB81E
+_zobrist_tables = {}
+
 
 class Game:
     """stores information about a game"""
 
-    def __init__(self, filename="", board="wwf15"):
+    def __init__(self, filename="", board="wwf15", cache=None, load_dictionary="eager", array_board=False):
         """constructor for a game
 
         Args:
             filename: the filename of a saved game if specified
+            board: the type of the board for a new game
+            cache: a MoveCache to store generated moves, or True to create a default one
+            load_dictionary: "eager" to load the dictionary now, "lazy" to load it on first use,
+                or "background" to load it in a separate thread while the board is prepared
+            array_board: whether to mirror the board with NumPy arrays to find anchors, requires numpy
 
         """
 
         logger.info("Initializing game...")
 
-        # load the state of the board from a saved game
+        if load_dictionary not in ["eager", "lazy", "background"]:
+            raise ValueError("invalid dictionary loading mode: {}".format(load_dictionary))
+
+        game_data = None
         if filename:
             filename = filename + ".p" if filename[-2:] != ".p" else filename
             logger.info("loading saved game from \"{}\"...".format(filename))
             game_data = self.__load_game_data_from_file(filename)
             self.board_type = game_data["board_type"]
+        else:
+            self.board_type = board
+
+        self._dictionary = None
+        self._dictionary_loader = None
+        if load_dictionary == "eager":
+            self.__load_dictionary()
+        elif load_dictionary == "background":
+            import threading
+            self._dictionary_loader = threading.Thread(target=self.__load_dictionary, daemon=True)
+            self._dictionary_loader.start()
+
+        # load the state of the board from a saved game
+        if game_data:
             self.board = game_data["board"]
             self.filename = game_data["filename"]
+            if not hasattr(self.board, "hash"):  # games saved before boards were hashed
+                self.board.hash = self.board.compute_hash()
         else:
             logger.info("starting new game and initializing board...")
-            self.board_type = board
             self.board = Board(board)
             self.filename = None
 
-        resource_directory = os.path.join(resource_dir, self.board_type)
-        tile_path = os.path.join(resource_directory, "tile_list.txt")
-        dictionary_path = os.path.join(resource_directory, "dictionary.txt")
-        saved_dictionary_path = os.path.join(resource_directory, "dictionary.p")
+        self.cache = MoveCache() if cache is True else cache
+
+        self.array_board = None
+        if array_board:
+            from scrabbler.array_board import ArrayBoard
+            self.array_board = ArrayBoard.from_board(self.board)
 
         # load the list of tiles and their corresponding scores
+        tile_path = os.path.join(resource_dir, self.board_type, "tile_list.txt")
         self.tiles = self.__load_tile_set_from_file(tile_path)
 
-        # load a saved dictionary object or construct a new one
+        logger.info("Game initialized successfully.")
+
+    @property
+    def dictionary(self):
+        """the dictionary of this game, which is loaded on first use if not loaded already"""
+
+        if self._dictionary is None and self._dictionary_loader:
+            self._dictionary_loader.join()
+            self._dictionary_loader = None
+        if self._dictionary is None:
+            self.__load_dictionary()
+        return self._dictionary
+
+    def __load_dictionary(self):
+        """loads a saved dictionary object or constructs a new one"""
+
+        resource_directory = os.path.join(resource_dir, self.board_type)
+        dictionary_path = os.path.join(resource_directory, "dictionary.txt")
+        saved_dictionary_path = os.path.join(resource_directory, "dictionary.p")
+
         if os.path.exists(saved_dictionary_path):
             logger.info("loading saved dictionary file...")
-            self.dictionary = Dictionary.load_from_pickle(saved_dictionary_path)
+            self._dictionary = Dictionary.load_from_pickle(saved_dictionary_path)
         else:
             logger.info("constructing dictionary...")
-            self.dictionary = Dictionary.construct_with_text_file(dictionary_path)
+            self._dictionary = Dictionary.construct_with_text_file(dictionary_path)
             logger.info("saving dictionary structure...")
-            self.dictionary.store(saved_dictionary_path)
-
-        logger.info("Game initialized successfully.")
+            self._dictionary.store(saved_dictionary_path)
 
     def save(self, filename=None):
         """saves an unfinished game to disk"""
 
+        import pickle
+        import gzip
+
         if not os.path.exists(full_saved_games_dir):
             os.makedirs(full_saved_games_dir)
         self.filename = filename if filename else self.filename if self.filename else generate_file_name()
@@ -79,32 +126,55 @@ class Game:
     def play(self, start_square, word, direction):
         """play a move on the board"""
 
-        self.board.place_word(start_square, word, direction)
+        try:
+            self.board.place_word(start_square, word, direction)
+        except Exception:
+            if self.array_board:  # a failed play may have left some of its tiles on the board
+                self.array_board = type(self.array_board).from_board(self.board)
+            raise
 
         # update affected cross sets
-        self.board.update_cross_set(start_square, direction, self.dictionary)
+        updated = self.board.update_cross_set(start_square, direction, self.dictionary)
         other_direction = "across" if direction == "down" else "down"
         coordinate = start_square
         for _ in word:
-            self.board.update_cross_set(coordinate, other_direction, self.dictionary)
+            updated.extend(self.board.update_cross_set(coordinate, other_direction, self.dictionary))
             coordinate = self.board.offset(coordinate, direction, 1)
 
-    def find_best_moves(self, rack, num=5):
-        """returns the five best moves"""
+        if self.array_board:
+            self.array_board.place_word(start_square, word, direction)
+            self.array_board.load_cross_sets(self.board, updated)
+
+    def find_best_moves(self, rack, num=5, show=True):
+        """returns the five best moves, printing them if show is set"""
+
+        key = MoveCache.make_key(self.board, rack, num) if self.cache is not None else None
+        moves = self.cache.get(key) if key else None
+        if moves is None:
+            moves = self.__generate_best_moves(list(rack), num)
+            if key:
+                self.cache.put(key, moves)
 
-        rack = list(rack)
+        if show:
+            for move in moves:
+                print(move)
+        return moves
+
+    def __generate_best_moves(self, rack, num):
+        """runs the full search for the highest scoring moves"""
 
         mid = int(self.board.size / 2)
         if self.board.empty:
             moves = self.board.generate_moves((mid, mid), "across", rack, self.dictionary, self.tiles, {})
         else:
-            across_moves = self.board.find_best_moves(rack, "across", self.dictionary, self.tiles)
-            down_moves = self.board.find_best_moves(rack, "down", self.dictionary, self.tiles)
+            across_anchors = self.array_board.anchor_list("across") if self.array_board else None
+            down_anchors = self.array_board.anchor_list("down") if self.array_board else None
+            across_moves = self.board.find_best_moves(rack, "across", self.dictionary, self.tiles, across_anchors)
+            down_moves = self.board.find_best_moves(rack, "down", self.dictionary, self.tiles, down_anchors)
             moves = across_moves + down_moves
 
         moves.sort(key=lambda move_: move_.score, reverse=True)
-        for move in moves[0:num]:
-            print(move)
+        return moves[0:num]
 
     def show(self):
         """prints the board to terminal"""
@@ -119,6 +189,10 @@ class Game:
     @staticmethod
     def __load_game_data_from_file(filename) -> dict:
         """loads an unfinished game from a file"""
+
+        import pickle
+        import gzip
+
         with gzip.open(os.path.join(full_saved_games_dir, filename), "rb") as f:
             return pickle.loads(f.read())
 
@@ -129,8 +203,11 @@ class Board:
     def __init__(self, board_type):
         """sets up the board as a list of concatenated lists of squares"""
 
+        import json
+
         self.board_type = board_type
         self.empty = True
+        self.hash = 0
 
         board_path = os.path.join(resource_dir, board_type)
         full_board_path = os.path.join(board_path, "board.json")
@@ -175,9 +252,13 @@ class Board:
         coordinate = start_coordinate
         offset = 0
         word = word.upper()
+        table = zobrist_table(self.size)
         try:
             for char in word:
+                new_tile = not self.square(*coordinate).tile
                 self.square(*coordinate).tile = char
+                if new_tile:  # update the hash as each tile is placed in case a later one fails
+                    self.hash ^= table[coordinate[0] * self.size + coordinate[1]][ord(char) - ord('A')]
                 offset = offset + 1
                 coordinate = self.offset(start_coordinate, direction, offset)
         except errors.IllegalMoveError:
@@ -186,9 +267,20 @@ class Board:
                 self.square(*coordinate).remove_tile()
                 offset = offset - 1
                 coordinate = self.offset(start_coordinate, direction, offset)
+            self.hash = self.compute_hash()
             raise errors.IllegalMoveError("Cannot place this word on the given coordinates")
         self.empty = False
 
+    def compute_hash(self):
+        """computes the Zobrist hash of the current tiles on the board from scratch"""
+
+        table = zobrist_table(self.size)
+        board_hash = 0
+        for index, square in enumerate(self._board):
+            if square.tile:
+                board_hash ^= table[index][ord(square.tile) - ord('A')]
+        return board_hash
+
     def generate_moves(self, anchor, direction, rack, dictionary, tile_set, anchors_used):
         """generate all possible moves from a given anchor with the current rack"""
 
@@ -319,10 +411,20 @@ class Board:
 
         return plays
 
-    def find_best_moves(self, rack, direction, dictionary, tile_set):
+    def find_best_moves(self, rack, direction, dictionary, tile_set, anchors=None):
+        """generates moves from every anchor, which are found square by square if not given"""
 
         anchors_used = []
         moves = []
+        for anchor in anchors if anchors is not None else self.anchors(direction):
+            moves.extend(self.generate_moves(anchor, direction, rack, dictionary, tile_set, anchors_used))
+            anchors_used.append(anchor)
+        return moves
+
+    def anchors(self, direction):
+        """lists the anchor squares for moves in the given direction, line by line"""
+
+        anchors = []
         other_direction = "across" if direction == "down" else "down"
 
         def is_anchor(coordinate_):
@@ -340,22 +442,25 @@ class Board:
             for j in range(self.size):
                 current = self.offset(left_most, direction, j)
                 if is_anchor(current):
-                    moves.extend(self.generate_moves(current, direction, rack, dictionary, tile_set, anchors_used))
-                    anchors_used.append(current)
-        return moves
+                    anchors.append(current)
+        return anchors
 
     def update_cross_set(self, start_coordinate, direction, dictionary):
-        """update cross sets affected by this coordinate"""
+        """update cross sets affected by this coordinate, returns the coordinates of updated squares"""
 
         def __clear_cross_sets(start_coordinate_, direction_):
+            updated_ = []
             right_most_square = self.fast_forward(start_coordinate_, direction_, 1)
             right_square_ = self.offset(right_most_square, direction_, 1)
             if self.square(*right_square_):
                 self.square(*right_square_).set_cross_set(direction_, {})
+                updated_.append(right_square_)
             left_most_square = self.fast_forward(start_coordinate_, direction_, -1)
             left_square_ = self.offset(left_most_square, direction_, -1)
             if self.square(*left_square_):
                 self.square(*left_square_).set_cross_set(direction_, {})
+                updated_.append(left_square_)
+            return updated_
 
         def __check_candidate(coordinate_, candidate_, direction_, step):
             last_arc_ = candidate_
@@ -372,7 +477,7 @@ class Board:
             return self.square(*coordinate_).tile in last_arc_.letter_set
 
         if not self.square(*start_coordinate) or not self.square(*start_coordinate).tile:
-            return  # do not do anything if this square is out of bounds or empty
+            return []  # do not do anything if this square is out of bounds or empty
         end_coordinate = self.fast_forward(start_coordinate, direction, 1)
 
         # traverse the dictionary in reverse order of the word
@@ -385,8 +490,7 @@ class Board:
             last_state = state  # this saves the previous state before incrementing
             state = state.get_next(self.square(*coordinate).tile)
             if not state:  # if non-words are found existing on the board
-                __clear_cross_sets(start_coordinate, direction)
-                return
+                return __clear_cross_sets(start_coordinate, direction)
             next_square = self.offset(coordinate, direction, -1)
 
         # now that we're at the head of the word
@@ -396,15 +500,18 @@ class Board:
         # check special case where there is a square with tiles on both sides
         left_of_left = self.offset(left_square, direction, -1)
         right_of_right = self.offset(right_square, direction, 1)
+        updated = []
 
         if self.square(*left_of_left) and self.square(*left_of_left).tile:
             candidates = (arc for arc in state if arc.char != "#")
             cross_set = set(
                 candidate.char for candidate in candidates if __check_candidate(left_square, candidate, direction, -1))
             self.square(*left_square).set_cross_set(direction, cross_set)
+            updated.append(left_square)
         elif self.square(*left_square):
             cross_set = last_state.get_arc(self.square(*coordinate).tile).letter_set
             self.square(*left_square).set_cross_set(direction, cross_set)
+            updated.append(left_square)
 
         if self.square(*right_of_right) and self.square(*right_of_right).tile:
             end_state = state.get_next(DELIMITER)
@@ -412,10 +519,14 @@ class Board:
             cross_set = set(
                 candidate.char for candidate in candidates if __check_candidate(right_square, candidate, direction, 1))
             self.square(*right_square).set_cross_set(direction, cross_set)
+            updated.append(right_square)
         elif self.square(*right_square):
             end_arc = state.get_arc(DELIMITER)
             cross_set = end_arc.letter_set if end_arc else {}
             self.square(*right_square).set_cross_set(direction, cross_set)
+            updated.append(right_square)
+
+        return updated
 
     @staticmethod
     def offset(coordinate, direction, offset):
@@ -499,6 +610,15 @@ class Move(object):
         return "Play \"{}\" {} from {} to get {} points.".format(
             self.word, self.direction, self.start_square, self.score)
 
+    def to_dict(self):
+        """converts this move into a dictionary that can be serialized to JSON"""
+        return {
+            "word": self.word,
+            "start_square": list(self.start_square),
+            "direction": self.direction,
+            "score": self.score
+        }
+
 
 class SquareEffect(Enum):
     """An enum for special attributes for a square"""
@@ -510,6 +630,17 @@ class SquareEffect(Enum):
     TL = 4
 
 
+def zobrist_table(size):
+    """gets the table of random keys for each letter on each square of a board of this size"""
+
+    if size not in _zobrist_tables:
+        import random
+        rng = random.Random(ZOBRIST_SEED + size)
+        _zobrist_tables[size] = [[rng.getrandbits(64) for _ in string.ascii_uppercase]
+                                 for _ in range(size * size)]
+    return _zobrist_tables[size]
+
+
 def generate_file_name():
     """generates a filename for a saved game based on the time"""
     import datetime
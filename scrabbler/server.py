@@ -0,0 +1,277 @@
+"""This file implements a long-running move generation server
+
+The server keeps a game, and thus a loaded dictionary, warm for every board type and
+accepts requests as newline-delimited JSON over a TCP or Unix socket. Searches are
+dispatched to a pool of pre-forked worker processes.
+
+A request is a JSON object of the form
+
+    {"board": "wwf15", "rack": "WDERSER", "num": 5,
+     "plays": [{"start": [7, 7], "word": "word", "direction": "across"}]}
+
+where "plays" lists the moves already on the board in the order they were played. The
+response is an object with a list of "moves" or an "error" message. A JSON array of
+requests may be sent on a single line, which is answered with an array of responses.
+
+Requests from all connections go into a single queue. Whenever a worker is free, up to
+batch_size queued requests are sent to it together, so batches form under load without
+any client having to send arrays. The queue is split evenly between idle workers, so that
+requests only share a worker when there are more of them than free workers.
+
+A request that times out is answered with an error, but its search still runs to the end
+and keeps its worker busy until then.
+
+Usage:
+    python -m scrabbler.server --port 8765
+    python -m scrabbler.server --unix /tmp/scrabbler.sock
+
+"""
+
+import os
+import json
+import copy
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from scrabbler.scrabbler import Game, resource_dir
+from scrabbler.cache import MoveCache
+import utilities.logger as logger
+
+LINE_LIMIT = 16 * 1024 * 1024  # the longest request line accepted, in bytes
+
+_games = {}
+_blank_boards = {}
+
+
+def available_board_types():
+    """lists the board types which have resources available"""
+    return sorted(name for name in os.listdir(resource_dir)
+                  if os.path.exists(os.path.join(resource_dir, name, "board.json")))
+
+
+def load_games(board_types):
+    """loads a game for each board type into this process"""
+
+    for board_type in board_types:
+        if board_type not in _games:
+            _games[board_type] = Game(board=board_type, cache=MoveCache())
+            _blank_boards[board_type] = copy.deepcopy(_games[board_type].board)
+
+
+def solve_batch(requests):
+    """solves a list of requests in a worker process"""
+    return [_solve(request) for request in requests]
+
+
+def _solve(request):
+    try:
+        board_type = request.get("board", "wwf15")
+        if board_type not in _games:
+            return {"error": "unknown board type: {}".format(board_type)}
+        game = _games[board_type]
+        game.board = copy.deepcopy(_blank_boards[board_type])
+        for play in request.get("plays", []):
+            game.play(tuple(play["start"]), play["word"], play["direction"])
+        moves = game.find_best_moves(request["rack"].upper(), request.get("num", 5), show=False)
+        return {"moves": [move.to_dict() for move in moves]}
+    except Exception as e:
+        return {"error": "{}: {}".format(type(e).__name__, e)}
+
+
+def _init_worker(board_types):
+    load_games(board_types)  # a no-op when the games were inherited from the parent by forking
+
+
+def _warm_up():
+    return os.getpid()
+
+
+class MoveServer:
+    """serves move generation requests from a pool of worker processes
+
+    Attributes:
+        board_types: the board types kept warm by the server
+        workers: the number of worker processes
+        timeout: the number of seconds to wait for each request before giving up on it
+        max_pending: the number of requests queued or running beyond which new requests are
+            rejected, a timed out request still counts until its worker has finished with it
+        batch_size: the largest number of queued requests sent to a worker at once
+
+    """
+
+    def __init__(self, board_types=None, workers=None, timeout=10.0, max_pending=64, batch_size=8):
+        self.board_types = board_types if board_types else available_board_types()
+        self.workers = workers if workers else os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.pending = 0
+        self._pool = None
+        self._server = None
+        self._queue = None
+        self._running = set()
+        self._busy = 0
+        self._dispatchers = []
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """loads the dictionaries, forks the workers and starts listening"""
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        if context.get_start_method() == "fork":
+            # load once in the parent so that every worker inherits the warm dictionaries
+            logger.info("loading dictionaries for {}...".format(", ".join(self.board_types)))
+            load_games(self.board_types)
+
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(self.board_types,))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+        logger.info("started {} workers.".format(self.workers))
+
+        # one dispatcher per worker, so that requests queue up and are batched while workers are busy
+        self._queue = asyncio.Queue()
+        self._dispatchers = [asyncio.create_task(self.__dispatch_batches()) for _ in range(self.workers)]
+
+        if path:
+            self._server = await asyncio.start_unix_server(self.__handle_connection, path=path, limit=LINE_LIMIT)
+            logger.info("listening on unix socket \"{}\"...".format(path))
+        else:
+            self._server = await asyncio.start_server(self.__handle_connection, host, port, limit=LINE_LIMIT)
+            logger.info("listening on {}:{}...".format(host, port))
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """stops listening and shuts down the workers"""
+
+        if self._server:
+            self._server.close()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def handle(self, requests):
+        """answers a list of requests, in the same order"""
+
+        if self.pending + len(requests) > self.max_pending:
+            return [{"error": "server busy"} for _ in requests]
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request in requests:
+            future = loop.create_future()
+            future.add_done_callback(self.__release)
+            self.pending = self.pending + 1
+            self._queue.put_nowait((request, future))
+            futures.append(future)
+        return await asyncio.gather(*(self.__wait(future) for future in futures))
+
+    def __release(self, _):
+        self.pending = self.pending - 1
+
+    async def __wait(self, future):
+        """waits for the response to a request, giving up after the timeout"""
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            if future not in self._running:
+                future.cancel()  # it has not reached a worker yet, so drop it from the queue
+            return {"error": "request timed out"}
+
+    async def __dispatch_batches(self):
+        """sends queued requests to a worker in batches, one batch at a time"""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # share the queued requests between idle workers rather than giving them all to one
+            idle = self.workers - self._busy
+            size = min(self.batch_size, -(-(self._queue.qsize() + 1) // idle))
+            while len(batch) < size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch = [(request, future) for request, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            requests = [request for request, _ in batch]
+            futures = [future for _, future in batch]
+            self._running.update(futures)
+            self._busy = self._busy + 1
+            try:
+                results = await loop.run_in_executor(self._pool, solve_batch, requests)
+            except Exception as e:
+                results = [{"error": "{}: {}".format(type(e).__name__, e)} for _ in requests]
+            finally:
+                self._busy = self._busy - 1
+                self._running.difference_update(futures)
+
+            # completing the futures releases the requests, even those that have timed out
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def __handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(json.dumps({"error": "request longer than {} bytes".format(LINE_LIMIT)}).encode())
+                    writer.write(b"\n")
+                    await writer.drain()
+                    break  # the rest of the line is still unread, so the connection cannot be resumed
+                if not line:
+                    break
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    response = {"error": "invalid JSON: {}".format(e)}
+                else:
+                    if isinstance(data, list):
+                        response = await self.handle(data)
+                    else:
+                        response = (await self.handle([data]))[0]
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # the client went away or the server is shutting down
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve move generation requests as newline-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this unix socket path instead of a TCP port")
+    parser.add_argument("--boards", nargs="*", help="the board types to keep warm, all by default")
+    parser.add_argument("--workers", type=int, help="the number of worker processes")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds allowed per request")
+    parser.add_argument("--max-pending", type=int, default=64, help="requests in flight before rejecting")
+    parser.add_argument("--batch-size", type=int, default=8, help="queued requests sent to a worker at once")
+    args = parser.parse_args()
+
+    server = MoveServer(args.boards, args.workers, args.timeout, args.max_pending, args.batch_size)
+
+    async def run():
+        await server.start(args.host, args.port, args.unix)
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info("server stopped.")
+
+
+if __name__ == "__main__":
+    main()